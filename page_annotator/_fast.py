@@ -0,0 +1,90 @@
+"""Small pure helpers on the proxy hot path.
+
+They only use builtins and the standard library so the module can be compiled with mypyc
+(see setup.py); the pure-Python module is used when no compiled extension is installed.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlsplit
+
+BLOCKING_XFO = {"deny", "sameorigin"}
+
+
+def frame_blocked(xfo: str, csp: str) -> Tuple[bool, Optional[str]]:
+    """Whether an X-Frame-Options/Content-Security-Policy pair forbids embedding, and why."""
+    if xfo:
+        normalized = xfo.split(",")[0].strip().lower()
+        if normalized in BLOCKING_XFO:
+            return True, f"xfo:{normalized}"
+    if not csp:
+        return False, None
+    directives = [chunk.strip() for chunk in csp.split(";") if chunk.strip()]
+    for directive in directives:
+        if not directive.lower().startswith("frame-ancestors"):
+            continue
+        tokens = directive.split()[1:]
+        lowered = [token.lower() for token in tokens]
+        if "'none'" in lowered:
+            return True, "csp:frame-ancestors-none"
+        if "'self'" in lowered:
+            return True, "csp:frame-ancestors-self"
+        # If directive exists but doesn't explicitly allow us, assume blocked.
+        return True, "csp:frame-ancestors-other"
+    return False, None
+
+
+@lru_cache(maxsize=64)
+def _base_origin(base_url: str) -> Tuple[str, str]:
+    parts = urlsplit(base_url)
+    return parts.scheme, f"{parts.scheme}://{parts.netloc}"
+
+
+def join_url(base_url: str, value: str) -> str:
+    """``urljoin`` with shortcuts for absolute, scheme-relative and root-relative URLs.
+
+    Values ``urljoin`` would clean up (whitespace, control characters, dot segments) take the slow path.
+    """
+    if value.isprintable() and value[:1] != " " and "/." not in value:
+        if value.startswith(("http://", "https://")):
+            return value
+        scheme, origin = _base_origin(base_url)
+        if scheme in ("http", "https"):
+            if value.startswith("//"):
+                return f"{scheme}:{value}"
+            if value.startswith("/"):
+                return origin + value
+    return urljoin(base_url, value)
+
+
+def rewrite_srcset(value: str, base_url: str) -> str:
+    candidates: List[str] = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        segments = part.split()
+        if not segments:
+            continue
+        url = join_url(base_url, segments[0])
+        descriptor = " ".join(segments[1:])
+        if descriptor:
+            candidates.append(f"{url} {descriptor}")
+        else:
+            candidates.append(url)
+    return ", ".join(candidates)
+
+
+def should_proxy_download(url: str) -> bool:
+    parsed = urlparse(url)
+    path = parsed.path.lower()
+    if not path:
+        return False
+    return path.endswith(".pdf")
+
+
+def is_allowed_url(url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in {"http", "https"}
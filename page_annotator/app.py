@@ -1,21 +1,129 @@
 from __future__ import annotations
 
 import argparse
+import codecs
+import gzip
+import hashlib
+import html
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from http.cookiejar import DefaultCookiePolicy
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import orjson
 import requests
 from bs4 import BeautifulSoup
-from flask import Flask, Response, jsonify, render_template, request
-from urllib.parse import quote, urljoin, urlparse
+from cachetools import LRUCache, TTLCache
+from flask import Flask, Response, render_template, request, stream_with_context
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote
+from urllib3.util.retry import Retry
 
+from ._fast import frame_blocked, is_allowed_url, join_url, rewrite_srcset, should_proxy_download
 from .configuration import AppConfig
 from .data_store import AnnotationDataStore
 
-BLOCKING_XFO = {"deny", "sameorigin"}
 DEFAULT_USER_AGENT = "PageAnnotator/1.0"
 
 
+UPSTREAM_POOL_MAXSIZE = 64
+# Request handlers mostly wait on upstream HTTP, so the server runs several threads per core.
+DEFAULT_SERVER_THREADS = max(16, (os.cpu_count() or 1) * 4)
+
+
+def _build_session(pool_maxsize: int = UPSTREAM_POOL_MAXSIZE) -> requests.Session:
+    """Shared upstream session so proxied fetches reuse pooled keep-alive connections."""
+    session = requests.Session()
+    # Keep upstream fetches stateless: cookies from one proxied page must not leak into another.
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_SESSION = _build_session()
+
+FRAME_STATUS_TTL_SECONDS = 300
+PROXY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PROXY_CACHE_MAX_ITEM_BYTES = 8 * 1024 * 1024
+PROXY_CHUNK_SIZE = 64 * 1024
+FORWARDED_BODY_HEADERS = ("Content-Length", "Content-Encoding")
+FRAME_CHECK_WORKERS = 16
+# Most entry ids a single /api/frame-check-batch request may ask about.
+FRAME_CHECK_BATCH_MAX_IDS = 32
+
+_FRAME_STATUS_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=FRAME_STATUS_TTL_SECONDS)
+_FRAME_STATUS_LOCK = threading.Lock()
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    status: int
+    headers: Dict[str, str]
+    validators: Dict[str, str]
+
+
+class ProxyCache:
+    """Byte-bounded LRU of proxied bodies, revalidated upstream through ETag/Last-Modified."""
+
+    def __init__(self, max_bytes: int, max_item_bytes: int):
+        self.max_item_bytes = max_item_bytes
+        self._entries: LRUCache = LRUCache(maxsize=max_bytes, getsizeof=lambda item: len(item.body))
+        self._lock = threading.Lock()
+
+    def lookup(self, url: str) -> Optional[CachedBody]:
+        with self._lock:
+            return self._entries.get(url)
+
+    def cacheable(self, resp: requests.Response) -> bool:
+        return resp.status_code == 200 and bool(_validators(resp))
+
+    def store(self, url: str, resp: requests.Response, body: bytes, headers: Dict[str, str]) -> None:
+        if len(body) > self.max_item_bytes or not self.cacheable(resp):
+            return
+        with self._lock:
+            self._entries[url] = CachedBody(body, resp.status_code, headers, _validators(resp))
+
+    @staticmethod
+    def conditional_headers(headers: Dict[str, str], cached: Optional[CachedBody]) -> Dict[str, str]:
+        if cached is None:
+            return headers
+        return {**headers, **cached.validators}
+
+
+_PROXY_CACHE = ProxyCache(PROXY_CACHE_MAX_BYTES, PROXY_CACHE_MAX_ITEM_BYTES)
+
+
+def _validators(resp: requests.Response) -> Dict[str, str]:
+    validators = {}
+    if resp.headers.get("ETag"):
+        validators["If-None-Match"] = resp.headers["ETag"]
+    if resp.headers.get("Last-Modified"):
+        validators["If-Modified-Since"] = resp.headers["Last-Modified"]
+    return validators
+
+
+@dataclass
+class EncodedState:
+    """One serialized /api/state payload with its gzip form and ETag."""
+
+    version: int
+    etag: str
+    body: bytes
+    gzipped: bytes
+
+
 class AppState:
     def __init__(self, config_path: Path | str, overrides: Dict[str, Any] | None = None):
         self.config_path = Path(config_path)
@@ -27,6 +135,32 @@ class AppState:
         self._apply_overrides(config)
         self.config = config
         self.data_store = AnnotationDataStore(self.config)
+        # The client config only changes on reload, so it is encoded once alongside the entries.
+        self._config_json = orjson.dumps(self.config.serialize_for_client())
+        self._encoded_state: EncodedState | None = None
+
+    def encoded_state(self) -> EncodedState:
+        """The /api/state payload, re-encoded only after the annotations change."""
+        # Read the version first: a save racing the build below leaves the cache marked stale.
+        version = self.data_store.version
+        cached = self._encoded_state
+        if cached is not None and cached.version == version:
+            return cached
+        payload: Dict[str, Any] = {
+            "config": orjson.Fragment(self._config_json),
+            "entries": orjson.Fragment(self.data_store.entries_client_json()),
+            "annotations": orjson.Fragment(self.data_store.annotations_client_json()),
+            "annotators": orjson.Fragment(self.data_store.annotators_client_json()),
+        }
+        body = orjson.dumps(payload)
+        encoded = EncodedState(
+            version=version,
+            etag=hashlib.blake2b(body, digest_size=16).hexdigest(),
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=6),
+        )
+        self._encoded_state = encoded
+        return encoded
 
     def _apply_overrides(self, config: AppConfig) -> None:
         viewer_overrides = self.overrides.get("viewer")
@@ -36,9 +170,12 @@ class AppState:
             config.viewer.detached_window = bool(viewer_overrides["detached_window"])
         if "prefer_proxy" in viewer_overrides:
             config.viewer.prefer_proxy = bool(viewer_overrides["prefer_proxy"])
+        if "safe_rewrite" in viewer_overrides:
+            config.viewer.safe_rewrite = bool(viewer_overrides["safe_rewrite"])
 
     def refresh(self) -> None:
         """Reload configuration and data from disk."""
+        self.data_store.close()
         self._load()
 
 
@@ -57,13 +194,22 @@ def create_app(config_path: Path | str = "config.yaml", overrides: Dict[str, Any
 
     @app.route("/api/state")
     def api_state() -> Response:
-        payload: Dict[str, Any] = {
-            "config": state.config.serialize_for_client(),
-            "entries": state.data_store.formatted_entries(),
-            "annotations": state.data_store.annotations_for_client(),
-            "annotators": state.data_store.annotators_for_client(),
-        }
-        return jsonify(payload)
+        encoded = state.encoded_state()
+        # Each content-coding is its own representation, so each gets its own strong ETag.
+        use_gzip = bool(request.accept_encodings.quality("gzip"))
+        etag = f"{encoded.etag}-gz" if use_gzip else encoded.etag
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif use_gzip:
+            response = Response(encoded.gzipped, mimetype="application/json")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(encoded.body, mimetype="application/json")
+        response.set_etag(etag)
+        response.vary.add("Accept-Encoding")
+        # Let browsers keep the payload but revalidate it on every load.
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     @app.route("/api/annotation/<int:entry_id>", methods=["GET", "POST"])
     def annotation(entry_id: int):
@@ -71,17 +217,17 @@ def create_app(config_path: Path | str = "config.yaml", overrides: Dict[str, Any
             try:
                 state.data_store.get_entry(entry_id)
             except KeyError:
-                return jsonify({"error": "Invalid entry id"}), 404
+                return _json({"error": "Invalid entry id"}, 404)
             if not state.data_store.is_entry_visible(entry_id):
-                return jsonify({"error": "Unknown entry"}), 404
+                return _json({"error": "Unknown entry"}, 404)
             annotation_values = state.data_store.annotations.get(entry_id, {})
             annotator_value = state.data_store.annotators.get(entry_id, "")
-            return jsonify({"values": annotation_values, "annotator": annotator_value})
+            return _json({"values": annotation_values, "annotator": annotator_value})
 
         payload = request.get_json(silent=True) or {}
         values = payload.get("values") if isinstance(payload, dict) else None
         if values is None:
-            return jsonify({"error": "Missing annotation values"}), 400
+            return _json({"error": "Missing annotation values"}, 400)
         annotator_name = ""
         if isinstance(payload, dict):
             annotator = payload.get("annotator")
@@ -90,8 +236,8 @@ def create_app(config_path: Path | str = "config.yaml", overrides: Dict[str, Any
         try:
             saved = state.data_store.save_annotation(entry_id, values, annotator=annotator_name)
         except KeyError:
-            return jsonify({"error": "Invalid entry id"}), 404
-        return jsonify({"values": saved, "annotator": annotator_name})
+            return _json({"error": "Invalid entry id"}, 404)
+        return _json({"values": saved, "annotator": annotator_name})
 
     @app.route("/api/proxy/<int:entry_id>")
     def proxy(entry_id: int):
@@ -101,23 +247,28 @@ def create_app(config_path: Path | str = "config.yaml", overrides: Dict[str, Any
             return Response("Unknown entry", status=404)
         if not state.data_store.is_entry_visible(entry_id):
             return Response("Unknown entry", status=404)
-        target_url = entry["url"]
-        upstream_headers = _build_upstream_headers()
+        target_url = entry.url
+        cached = _PROXY_CACHE.lookup(target_url)
+        upstream_headers = ProxyCache.conditional_headers(_build_upstream_headers(), cached)
         try:
-            resp = requests.get(target_url, timeout=15, headers=upstream_headers)
+            resp = _SESSION.get(target_url, timeout=15, headers=upstream_headers, stream=True)
         except requests.RequestException as exc:  # pragma: no cover - network timing errors
             return Response(f"Unable to load proxied content: {exc}", status=502)
 
         content_type = resp.headers.get("Content-Type", "text/html")
-        body = resp.content
-        resolved_url = resp.url or target_url
-        if "text/html" in content_type:
-            rewritten = _rewrite_html(resolved_url, resp)
+        if cached is not None and resp.status_code == 304:
+            resp.close()
+            proxied = _cached_response(cached)
+        elif "text/html" in content_type:
+            body = resp.content
+            rewritten = _rewrite_html(resp.url or target_url, resp, safe=state.config.viewer.safe_rewrite)
             if rewritten is not None:
                 body = rewritten
-
-        proxied = Response(body, status=resp.status_code)
-        proxied.headers["Content-Type"] = content_type
+            headers = {"Content-Type": content_type}
+            _PROXY_CACHE.store(target_url, resp, body, headers)
+            proxied = Response(body, status=resp.status_code, headers=headers)
+        else:
+            proxied = _streamed_response(target_url, resp, content_type)
         proxied.headers["X-Frame-Options"] = "SAMEORIGIN"
         return proxied
 
@@ -126,24 +277,27 @@ def create_app(config_path: Path | str = "config.yaml", overrides: Dict[str, Any
         target = request.args.get("url")
         if not target:
             return Response("Missing 'url' parameter", status=400)
-        if not _is_allowed_url(target):
+        if not is_allowed_url(target):
             return Response("Unsupported URL scheme", status=400)
-        upstream_headers = _build_upstream_headers()
+        cached = _PROXY_CACHE.lookup(target)
+        upstream_headers = ProxyCache.conditional_headers(_build_upstream_headers(), cached)
         try:
-            resp = requests.get(target, timeout=20, headers=upstream_headers, stream=True)
+            resp = _SESSION.get(target, timeout=20, headers=upstream_headers, stream=True)
         except requests.RequestException as exc:  # pragma: no cover - network timing errors
             return Response(f"Unable to load resource: {exc}", status=502)
 
-        proxied = Response(resp.content, status=resp.status_code)
-        proxied.headers["Content-Type"] = resp.headers.get("Content-Type", "application/octet-stream")
-        return proxied
+        if cached is not None and resp.status_code == 304:
+            resp.close()
+            return _cached_response(cached)
+        content_type = resp.headers.get("Content-Type", "application/octet-stream")
+        return _streamed_response(target, resp, content_type)
 
     @app.route("/pdf-viewer")
     def pdf_viewer():
         target = request.args.get("url", "").strip()
         if not target:
             return Response("Missing 'url' parameter", status=400)
-        if not _is_allowed_url(target):
+        if not is_allowed_url(target):
             return Response("Unsupported URL scheme", status=400)
         proxied = f"/api/proxy/resource?url={quote(target, safe='')}"
         return render_template("pdf_viewer.html", pdf_src=proxied, original_url=target)
@@ -153,55 +307,134 @@ def create_app(config_path: Path | str = "config.yaml", overrides: Dict[str, Any
         try:
             entry = state.data_store.get_entry(entry_id)
         except KeyError:
-            return jsonify({"error": "Unknown entry"}), 404
+            return _json({"error": "Unknown entry"}, 404)
         if not state.data_store.is_entry_visible(entry_id):
-            return jsonify({"error": "Unknown entry"}), 404
-        target_url = entry["url"]
+            return _json({"error": "Unknown entry"}, 404)
         try:
-            resp = _fetch_headers(target_url, headers=_build_upstream_headers())
+            blocked, reason = _cached_frame_status(entry.url, headers=_build_upstream_headers())
         except requests.RequestException as exc:  # pragma: no cover - network timing errors
-            return jsonify({"error": f"Failed to inspect headers: {exc}"}), 502
-        blocked, reason = _frame_blocked(resp.headers)
-        resp.close()
-        payload = {"blocked": blocked}
-        if reason:
-            payload["reason"] = reason
-        return jsonify(payload)
+            return _json({"error": f"Failed to inspect headers: {exc}"}, 502)
+        return _json(_frame_payload(blocked, reason))
+
+    @app.route("/api/frame-check-batch")
+    def frame_check_batch():
+        raw_ids = request.args.get("ids", "").strip()
+        if not raw_ids:
+            return _json({"error": "Missing 'ids' parameter"}, 400)
+        try:
+            entry_ids = [int(value) for value in raw_ids.split(",") if value.strip()]
+        except ValueError:
+            return _json({"error": "Invalid entry id"}, 400)
+        if len(entry_ids) > FRAME_CHECK_BATCH_MAX_IDS:
+            return _json({"error": f"At most {FRAME_CHECK_BATCH_MAX_IDS} ids per request"}, 400)
+        urls: Dict[int, str] = {}
+        for entry_id in entry_ids:
+            try:
+                entry = state.data_store.get_entry(entry_id)
+            except KeyError:
+                continue
+            if state.data_store.is_entry_visible(entry_id):
+                urls[entry_id] = entry.url
+        return _json(_frame_statuses(urls, headers=_build_upstream_headers()))
 
     return app
 
 
+def _json(payload: Any, status: int = 200) -> Response:
+    """orjson-encoded JSON response; non-str keys such as entry ids are stringified by orjson."""
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return Response(body, status=status, mimetype="application/json")
+
+
+def _cached_response(cached: CachedBody) -> Response:
+    return Response(cached.body, status=cached.status, headers=cached.headers)
+
+
+def _streamed_response(url: str, resp: requests.Response, content_type: str) -> Response:
+    """Relay the upstream body chunk by chunk, forwarding its length and encoding verbatim."""
+    headers = {"Content-Type": content_type}
+    for name in FORWARDED_BODY_HEADERS:
+        if resp.headers.get(name):
+            headers[name] = resp.headers[name]
+    body = _iter_upstream(url, resp, headers)
+    return Response(stream_with_context(body), status=resp.status_code, headers=headers)
+
+
+def _iter_upstream(url: str, resp: requests.Response, headers: Dict[str, str]) -> Iterator[bytes]:
+    # Undecoded bytes, so the forwarded Content-Encoding/Content-Length still describe the body.
+    buffered: Optional[List[bytes]] = [] if _PROXY_CACHE.cacheable(resp) else None
+    size = 0
+    try:
+        for chunk in resp.raw.stream(PROXY_CHUNK_SIZE, decode_content=False):
+            if buffered is not None:
+                size += len(chunk)
+                if size > PROXY_CACHE_MAX_ITEM_BYTES:
+                    buffered = None
+                else:
+                    buffered.append(chunk)
+            yield chunk
+    finally:
+        resp.close()
+    if buffered is not None:
+        _PROXY_CACHE.store(url, resp, b"".join(buffered), headers)
+
+
 def _fetch_headers(url: str, headers: Dict[str, str] | None = None) -> requests.Response:
     """Try HEAD first and fall back to GET to read headers."""
-    resp = requests.head(url, timeout=10, allow_redirects=True, headers=headers)
+    resp = _SESSION.head(url, timeout=10, allow_redirects=True, headers=headers)
     if resp.status_code in {405, 501} or resp.status_code >= 400:
         resp.close()
-        resp = requests.get(url, timeout=10, allow_redirects=True, stream=True, headers=headers)
+        resp = _SESSION.get(url, timeout=10, allow_redirects=True, stream=True, headers=headers)
     return resp
 
 
+def _cached_frame_status(url: str, headers: Dict[str, str] | None = None) -> Tuple[bool, str | None]:
+    """Return the embedding status for ``url``, re-inspecting headers at most every TTL."""
+    with _FRAME_STATUS_LOCK:
+        cached = _FRAME_STATUS_CACHE.get(url)
+    if cached is not None:
+        return cached
+    resp = _fetch_headers(url, headers=headers)
+    try:
+        status = _frame_blocked(resp.headers)
+    finally:
+        resp.close()
+    with _FRAME_STATUS_LOCK:
+        _FRAME_STATUS_CACHE[url] = status
+    return status
+
+
+def _frame_statuses(urls: Dict[int, str], headers: Dict[str, str] | None = None) -> Dict[int, Dict[str, Any]]:
+    """Inspect every unique URL concurrently and map the results back to entry ids."""
+    by_url: Dict[str, Dict[str, Any]] = {}
+    unique_urls = set(urls.values())
+    if unique_urls:
+        with ThreadPoolExecutor(max_workers=min(FRAME_CHECK_WORKERS, len(unique_urls))) as executor:
+            futures = {url: executor.submit(_cached_frame_status, url, headers) for url in unique_urls}
+            for url, future in futures.items():
+                try:
+                    by_url[url] = _frame_payload(*future.result())
+                except requests.RequestException as exc:  # pragma: no cover - network timing errors
+                    by_url[url] = {"error": f"Failed to inspect headers: {exc}"}
+    return {entry_id: by_url[url] for entry_id, url in urls.items()}
+
+
+def _frame_payload(blocked: bool, reason: str | None) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"blocked": blocked}
+    if reason:
+        payload["reason"] = reason
+    return payload
+
+
 def _frame_blocked(headers: Dict[str, str]) -> Tuple[bool, str | None]:
-    xfo = headers.get("X-Frame-Options", "")
-    if xfo:
-        normalized = xfo.split(",")[0].strip().lower()
-        if normalized in BLOCKING_XFO:
-            return True, f"xfo:{normalized}"
-    csp = headers.get("Content-Security-Policy", "")
-    if not csp:
-        return False, None
-    directives = [chunk.strip() for chunk in csp.split(";") if chunk.strip()]
-    for directive in directives:
-        if not directive.lower().startswith("frame-ancestors"):
-            continue
-        tokens = directive.split()[1:]
-        lowered = [token.lower() for token in tokens]
-        if "'none'" in lowered:
-            return True, "csp:frame-ancestors-none"
-        if "'self'" in lowered:
-            return True, "csp:frame-ancestors-self"
-        # If directive exists but doesn't explicitly allow us, assume blocked.
-        return True, "csp:frame-ancestors-other"
-    return False, None
+    return _frame_blocked_cached(
+        headers.get("X-Frame-Options", ""),
+        headers.get("Content-Security-Policy", ""),
+    )
+
+
+# Sites tend to send the same CSP on every page, so verdicts are memoized per header pair.
+_frame_blocked_cached = lru_cache(maxsize=1024)(frame_blocked)
 
 
 def _build_upstream_headers() -> Dict[str, str]:
@@ -220,36 +453,144 @@ RESOURCE_ATTRS = {
     "audio": ["src"],
     "form": ["action"],
 }
+_TAG_NAMES = list(RESOURCE_ATTRS)
+
+# Attributes of an opening tag; quoted values may contain '>'.
+_TAG_ATTRS = rb"((?:[^>\"']|\"[^\"]*\"|'[^']*')*)"
+_RAW_TEXT_TAGS = rb"script|style|textarea|title|xmp"
+_RESOURCE_TAGS = b"|".join(name.encode("ascii") for name in RESOURCE_ATTRS)
+# Comments and raw-text elements are matched whole so tag-like text inside them (inline JS
+# strings, CSS, textarea contents) is never rewritten; only a <script> opening tag is. The last
+# alternative only matches an opener whose tag never closes: the pass then gives up on the page
+# instead of rescanning to the end of the document from every such opener.
+_RESOURCE_TAG_RE = re.compile(
+    rb"(<!--.*?(?:-->|\Z))"
+    rb"|<(" + _RAW_TEXT_TAGS + rb")(?=[\s/>])" + _TAG_ATTRS + rb">(.*?)(?=</\2\s*>|\Z)"
+    rb"|<(" + _RESOURCE_TAGS + rb")(?=[\s/>])" + _TAG_ATTRS + rb">"
+    rb"|(<(?:" + _RAW_TEXT_TAGS + rb"|" + _RESOURCE_TAGS + rb")(?=[\s/>]))",
+    re.IGNORECASE | re.DOTALL,
+)
+# One attribute with an optional double-quoted, single-quoted or bare value.
+_ATTRIBUTE_RE = re.compile(rb"([^\s\"'>/=]+)(?:\s*=\s*(\"[^\"]*\"|'[^']*'|[^\s\"'=<>`]+))?")
+_HEAD_TAG_RE = re.compile(rb"<head(?=[\s>])[^>]*>", re.IGNORECASE)
+_BASE_TAG_RE = re.compile(rb"<base(?=[\s/>])", re.IGNORECASE)
+
+
+def _rewrite_html(base_url: str, response: requests.Response, safe: bool = False) -> bytes | None:
+    if not _needs_rewrite(response.content, base_url):
+        return None
+    if not safe:
+        rewritten = _rewrite_html_fast(base_url, response)
+        if rewritten is not None:
+            return rewritten
+    return _rewrite_html_soup(base_url, response)
+
+
+def _needs_rewrite(content: bytes, base_url: str) -> bool:
+    """Whether a body labelled text/html is worth rewriting at all."""
+    # Only bodies without any markup (mislabelled text/JSON) are passed through as is; even a
+    # tiny page or one behind a long run of blank lines needs its <base> and asset links.
+    if b"<" not in content:
+        return False
+    # A body that already points its <base> at this URL has been rewritten before.
+    return b'<base href="' + html.escape(base_url).encode("utf-8") + b'"' not in content
+
 
+def _rewrite_html_fast(base_url: str, response: requests.Response) -> bytes | None:
+    """Rewrite resource attributes in the raw bytes, leaving the rest of the markup untouched.
 
-def _rewrite_html(base_url: str, response: requests.Response) -> bytes | None:
+    Returns None for documents this shortcut does not handle so the caller falls back to bs4.
+    """
+    content = response.content
+    encoding = _declared_charset(response) or "utf-8"
+    try:
+        if codecs.lookup(encoding).name.startswith(("utf-16", "utf-32")):
+            return None
+    except LookupError:
+        return None
+    if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)) or _BASE_TAG_RE.search(content):
+        return None
+    try:
+        base_tag = b'<base href="' + html.escape(base_url).encode(encoding) + b'">'
+        body = _RESOURCE_TAG_RE.sub(partial(_rewrite_tag, base_url, encoding), content)
+    except (UnicodeError, _UnclosedTag):
+        return None
+    return _HEAD_TAG_RE.sub(lambda match: match.group(0) + base_tag, body, count=1)
+
+
+class _UnclosedTag(Exception):
+    """Raised mid-substitution when the regex pass meets a tag it cannot delimit."""
+
+
+def _rewrite_tag(base_url: str, encoding: str, match: re.Match) -> bytes:
+    if match.group(7) is not None:
+        raise _UnclosedTag
+    if match.group(1) is not None:
+        return match.group(1)
+    if match.group(2) is not None:
+        name, attrs, text = match.group(2, 3, 4)
+        if name.lower() == b"script":
+            attrs = _ATTRIBUTE_RE.sub(partial(_rewrite_attribute, "script", base_url, encoding), attrs)
+        return b"<" + name + attrs + b">" + text
+    name = match.group(5)
+    tag = name.decode("ascii").lower()
+    attrs = _ATTRIBUTE_RE.sub(partial(_rewrite_attribute, tag, base_url, encoding), match.group(6))
+    return b"<" + name + attrs + b">"
+
+
+def _rewrite_attribute(tag: str, base_url: str, encoding: str, match: re.Match) -> bytes:
+    name, raw_value = match.group(1), match.group(2)
+    attr = name.decode("latin-1").lower()
+    if raw_value is None or attr not in RESOURCE_ATTRS[tag]:
+        return match.group(0)
+    quote_char = raw_value[:1]
+    if quote_char in (b'"', b"'"):
+        raw_value = raw_value[1:-1]
+    else:
+        quote_char = b'"'
+    value = html.unescape(raw_value.decode(encoding, "surrogateescape"))
+    if not value:
+        return match.group(0)
+    rewritten = _rewrite_resource_url(tag, attr, value, base_url)
+    return name + b"=" + quote_char + html.escape(rewritten).encode(encoding, "surrogateescape") + quote_char
+
+
+def _rewrite_resource_url(tag: str, attr: str, value: str, base_url: str) -> str:
+    if attr == "srcset":
+        return rewrite_srcset(value, base_url)
+    absolute = join_url(base_url, value)
+    if tag == "a" and attr == "href" and should_proxy_download(absolute):
+        return f"/api/proxy/resource?url={quote(absolute, safe='')}"
+    return absolute
+
+
+def _rewrite_html_soup(base_url: str, response: requests.Response) -> bytes | None:
     try:
         encoding = response.encoding or "utf-8"
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(response.content, "lxml", from_encoding=_declared_charset(response))
     except Exception:
         return None
 
     _ensure_base_tag(soup, base_url)
 
-    for tag_name, attributes in RESOURCE_ATTRS.items():
-        for tag in soup.find_all(tag_name):
-            for attr in attributes:
-                if attr not in tag.attrs:
-                    continue
-                value = tag.attrs.get(attr)
-                if not value:
-                    continue
-                if attr == "srcset":
-                    tag[attr] = _rewrite_srcset(value, base_url)
-                else:
-                    absolute = urljoin(base_url, value)
-                    if tag_name == "a" and attr == "href" and _should_proxy_download(absolute):
-                        tag[attr] = f"/api/proxy/resource?url={quote(absolute, safe='')}"
-                    else:
-                        tag[attr] = absolute
+    # One traversal for every resource tag instead of one find_all() per tag name.
+    for tag in soup.find_all(_TAG_NAMES):
+        for attr in RESOURCE_ATTRS[tag.name]:
+            value = tag.attrs.get(attr)
+            if value:
+                tag[attr] = _rewrite_resource_url(tag.name, attr, value, base_url)
+
+    return soup.encode(encoding)
 
-    html = soup.encode(encoding)
-    return html
+
+def _declared_charset(response: requests.Response) -> str | None:
+    """Return the charset announced in Content-Type so bs4 can skip sniffing."""
+    content_type = response.headers.get("Content-Type", "")
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset":
+            return value.strip().strip("'\"") or None
+    return None
 
 
 def _ensure_base_tag(soup: BeautifulSoup, base_url: str) -> None:
@@ -267,37 +608,6 @@ def _ensure_base_tag(soup: BeautifulSoup, base_url: str) -> None:
         base_tag["href"] = base_url
 
 
-def _rewrite_srcset(value: str, base_url: str) -> str:
-    candidates = []
-    for part in value.split(","):
-        part = part.strip()
-        if not part:
-            continue
-        segments = part.split()
-        if not segments:
-            continue
-        url = urljoin(base_url, segments[0])
-        descriptor = " ".join(segments[1:])
-        if descriptor:
-            candidates.append(f"{url} {descriptor}")
-        else:
-            candidates.append(url)
-    return ", ".join(candidates)
-
-
-def _should_proxy_download(url: str) -> bool:
-    parsed = urlparse(url)
-    path = parsed.path.lower()
-    if not path:
-        return False
-    return path.endswith(".pdf")
-
-
-def _is_allowed_url(url: str) -> bool:
-    parsed = urlparse(url)
-    return parsed.scheme in {"http", "https"}
-
-
 def main() -> None:
     parser = argparse.ArgumentParser(description="Page annotation tool")
     parser.add_argument(
@@ -308,15 +618,87 @@ def main() -> None:
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", type=int, default=5000)
     parser.add_argument("--debug", action="store_true", help="Enable Flask debug mode")
+    parser.add_argument(
+        "--safe-rewrite",
+        action="store_true",
+        help="Rewrite proxied HTML with BeautifulSoup instead of the faster regex pass",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=DEFAULT_SERVER_THREADS,
+        help=f"Request threads for the gunicorn server (default: {DEFAULT_SERVER_THREADS})",
+    )
     args = parser.parse_args()
 
-    run_server(args.config, host=args.host, port=args.port, debug=args.debug)
+    run_server(
+        args.config,
+        host=args.host,
+        port=args.port,
+        debug=args.debug,
+        safe_rewrite=args.safe_rewrite,
+        threads=args.threads,
+    )
 
 
-def run_server(config_path: str, host: str = "127.0.0.1", port: int = 5000, debug: bool = False) -> None:
-    app = create_app(config_path)
+def run_server(
+    config_path: str,
+    host: str = "127.0.0.1",
+    port: int = 5000,
+    debug: bool = False,
+    safe_rewrite: bool = False,
+    threads: int = DEFAULT_SERVER_THREADS,
+) -> None:
+    overrides = {"viewer": {"safe_rewrite": True}} if safe_rewrite else None
+    if not debug and _serve_with_gunicorn(config_path, overrides, host, port, threads):
+        return
+    app = create_app(config_path, overrides=overrides)
     app.run(host=host, port=port, debug=debug)
 
 
+def _serve_with_gunicorn(
+    config_path: str,
+    overrides: Dict[str, Any] | None,
+    host: str,
+    port: int,
+    threads: int,
+) -> bool:
+    """Serve the app with gunicorn's threaded worker; return False if gunicorn is unavailable."""
+    global _SESSION
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:  # gunicorn does not support Windows
+        return False
+
+    if threads > UPSTREAM_POOL_MAXSIZE:
+        # Give every request thread its own keep-alive connection per upstream host.
+        _SESSION = _build_session(pool_maxsize=threads)
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, options: Dict[str, Any]):
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Flask:
+            # Build the app in the worker, not the master: a respawned worker must reload the
+            # CSV and replay the journal instead of inheriting the master's load-time snapshot.
+            return create_app(config_path, overrides=overrides)
+
+    bind_host = f"[{host}]" if ":" in host else host
+    options = {
+        "bind": f"{bind_host}:{port}",
+        # Annotations live in this process' memory, so scale with threads rather than workers.
+        "workers": 1,
+        "worker_class": "gthread",
+        "threads": threads,
+    }
+    StandaloneApplication(options).run()
+    return True
+
+
 if __name__ == "__main__":
     main()
@@ -5,7 +5,7 @@ import sys
 from pathlib import Path
 from typing import Iterable, List, Sequence
 
-from .app import run_server
+from .app import DEFAULT_SERVER_THREADS, run_server
 
 DEFAULT_CONFIG_LOCATIONS = ["config.yaml", "config.yml"]
 DEFAULT_CONFIG_DIRS = [Path.cwd(), Path.cwd() / "examples"]
@@ -75,6 +75,17 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--host", default="127.0.0.1", help="Host for the Flask server")
     parser.add_argument("--port", type=int, default=5000, help="Port for the Flask server")
     parser.add_argument("--debug", action="store_true", help="Enable Flask debug mode")
+    parser.add_argument(
+        "--safe-rewrite",
+        action="store_true",
+        help="Rewrite proxied HTML with BeautifulSoup instead of the faster regex pass",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=DEFAULT_SERVER_THREADS,
+        help=f"Request threads for the gunicorn server (default: {DEFAULT_SERVER_THREADS})",
+    )
     parser.add_argument("--list-configs", action="store_true", help="List discovered configs and exit")
     return parser
 
@@ -102,7 +113,14 @@ def main(argv: Iterable[str] | None = None) -> None:
     else:
         config_path = prompt_for_config(configs)
 
-    run_server(str(config_path), host=args.host, port=args.port, debug=args.debug)
+    run_server(
+        str(config_path),
+        host=args.host,
+        port=args.port,
+        debug=args.debug,
+        safe_rewrite=args.safe_rewrite,
+        threads=args.threads,
+    )
 
 
 if __name__ == "__main__":
@@ -6,6 +6,11 @@ from typing import Any, Dict, List, Optional
 
 import yaml
 
+try:  # libyaml bindings ship with the PyYAML wheels on most platforms
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - pure-Python PyYAML build
+    from yaml import SafeLoader as _YamlLoader
+
 
 @dataclass
 class ViewerConfig:
@@ -15,6 +20,7 @@ class ViewerConfig:
     open_original_in_new_tab: bool = True
     auto_proxy_on_block: bool = True
     detached_window: bool = False
+    safe_rewrite: bool = False
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ViewerConfig":
@@ -29,6 +35,7 @@ class ViewerConfig:
             open_original_in_new_tab=bool(data.get("open_original_in_new_tab", True)),
             auto_proxy_on_block=bool(data.get("auto_proxy_on_block", True)),
             detached_window=bool(data.get("detached_window", False)),
+            safe_rewrite=bool(data.get("safe_rewrite", False)),
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -160,7 +167,7 @@ class AppConfig:
         if not path.exists():
             raise FileNotFoundError(f"Config file {path} does not exist")
         with path.open("r", encoding="utf-8") as fh:
-            raw = yaml.safe_load(fh) or {}
+            raw = yaml.load(fh, Loader=_YamlLoader) or {}
 
         data_file = raw.get("data_file")
         if not data_file:
@@ -1,13 +1,65 @@
 from __future__ import annotations
 
+import atexit
 import csv
+import logging
+import os
+import queue
 import re
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Sequence
+
+import orjson
 
 from .configuration import AppConfig
 
+logger = logging.getLogger(__name__)
+
 ENTRY_ID_COLUMN = "entry_id"
+# Number of journaled saves after which the output CSV is rewritten and the journal cleared.
+JOURNAL_COMPACT_EVERY = 50
+# How long the background writer waits to coalesce a burst of saves into one journal write.
+WRITER_DEBOUNCE_SECONDS = 0.25
+# How long the background writer waits before retrying a failed journal write.
+WRITER_RETRY_SECONDS = 2.0
+# Separators accepted between several names in the annotator column.
+_ANNOTATOR_DELIMITERS = frozenset(";,|\n")
+_ANNOTATOR_DELIMITER_RE = re.compile(r"[;,|\n]+")
+
+
+class RowView(Mapping):
+    """Read-only mapping over one row of the column-oriented dataset."""
+
+    __slots__ = ("_index", "_columns", "_row")
+
+    def __init__(self, index: Dict[str, int], columns: List[List[Optional[str]]], row: int):
+        self._index = index
+        self._columns = columns
+        self._row = row
+
+    def __getitem__(self, key: str) -> Optional[str]:
+        return self._columns[self._index[key]][self._row]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+@dataclass
+class Entry:
+    """One dataset row as handed to callers; built on demand from the column store."""
+
+    __slots__ = ("id", "url", "data")
+
+    id: int
+    url: str
+    data: RowView
 
 
 class AnnotationDataStore:
@@ -15,31 +67,64 @@ class AnnotationDataStore:
 
     def __init__(self, config: AppConfig):
         self.config = config
-        self.entries: List[Dict[str, Any]] = []
-        self._entry_map: Dict[int, Dict[str, Any]] = {}
+        # Rows are stored column-wise: one list per CSV column, indexed by entry id.
+        self._column_index: Dict[str, int] = {}
+        self._columns: List[List[Optional[str]]] = []
+        self._entry_urls: List[str] = []
         self.annotations: Dict[int, Dict[str, Any]] = {}
         self.annotators: Dict[int, str] = {}
         self.csv_fieldnames: List[str] = []
-        self._visible_entry_ids: Optional[List[int]] = None
-        self._visible_entry_id_set: Optional[Set[int]] = None
-        self._allowed_annotators: Optional[Set[str]] = (
-            {value.lower() for value in config.annotator_filter} if config.annotator_filter else None
+        self._visible_entry_ids: Sequence[int] = ()
+        # One byte per entry id, set when the entry passes annotator_filter; None when nothing is filtered.
+        self._visible_mask: Optional[bytearray] = None
+        self._allowed_annotators: Optional[FrozenSet[str]] = (
+            frozenset(value.lower() for value in config.annotator_filter) if config.annotator_filter else None
         )
+        self._lock = threading.Lock()
+        # Bumped on every save so cached client payloads can tell they are stale.
+        self.version = 0
+        self._entries_json = b"[]"
+        self._annotations_json: Optional[bytes] = None
+        self._annotators_json: Optional[bytes] = None
+        self._client_annotations: Dict[int, Dict[str, Any]] = {}
+        self._client_annotators: Dict[int, str] = {}
+        self._journal_path = config.annotation_output.with_suffix(".jsonl")
+        self._journaled_saves = 0
+        # Set by every save and cleared when the CSV is rewritten, so saves whose journal write
+        # failed still reach the CSV on the next compaction.
+        self._dirty = False
+        self._io_lock = threading.Lock()
+        self._writer_queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._annotation_fields = tuple(config.annotation_fields)
+        self._output_header: List[str] = []
+        self._output_fill_columns: List[Optional[List[Optional[str]]]] = []
+        self._output_positions: Dict[str, List[int]] = {}
 
         self._load_entries()
+        self._visible_entry_ids = range(len(self._entry_urls))
+        self._build_output_layout()
         self._apply_visibility_filter()
         self._seed_annotations_from_source()
         self._load_existing_annotations()
+        if self._replay_journal():
+            self._compact()
+        self._seed_client_views()
+        self._entries_json = self._build_entries_json()
+        atexit.register(self.close)
 
     def _load_entries(self) -> None:
         data_path = self.config.data_file
         if not data_path.exists():
             raise FileNotFoundError(f"Data file {data_path} was not found")
         with data_path.open("r", encoding="utf-8", newline="") as fh:
-            reader = csv.DictReader(fh)
-            if not reader.fieldnames:
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if not header:
                 raise ValueError("The provided CSV file does not contain a header row")
-            self.csv_fieldnames = reader.fieldnames
+            self.csv_fieldnames = header
+            self._column_index = {name: position for position, name in enumerate(header)}
+            self._columns = [[] for _ in header]
             if (
                 self.config.annotator_filter
                 and self.config.annotator_column
@@ -49,37 +134,50 @@ class AnnotationDataStore:
                     f"annotator_column '{self.config.annotator_column}' was not found in {data_path} "
                     "but annotator_filter is enabled."
                 )
-            for idx, row in enumerate(reader):
-                url_value = row.get(self.config.viewer.url_column)
+            url_position = self._column_index.get(self.config.viewer.url_column)
+            width = len(header)
+            for idx, values in enumerate(values for values in reader if values):
+                # Short rows read as None for the missing trailing columns, like csv.DictReader.
+                if len(values) < width:
+                    values = values + [None] * (width - len(values))
+                url_value = values[url_position] if url_position is not None else None
                 if not url_value:
                     raise ValueError(
                         f"Row {idx + 1} is missing the URL column '{self.config.viewer.url_column}'"
                     )
-                entry = {
-                    "id": idx,
-                    "url": url_value,
-                    "data": row,
-                }
-                self.entries.append(entry)
-                self._entry_map[idx] = entry
-        if not self.entries:
+                for column, value in zip(self._columns, values):
+                    column.append(value)
+                self._entry_urls.append(url_value)
+        if not self._entry_urls:
             raise ValueError("No rows were loaded from the data CSV")
 
     def _apply_visibility_filter(self) -> None:
         if not self._allowed_annotators or not self.config.annotator_column:
             return
-        visible_ids: List[int] = []
-        for entry in self.entries:
-            assigned = entry["data"].get(self.config.annotator_column, "")
-            if self._annotator_matches_filter(assigned):
-                visible_ids.append(entry["id"])
-        self._visible_entry_ids = visible_ids
-        self._visible_entry_id_set = set(visible_ids)
+        assigned_values = self._column_values(self.config.annotator_column)
+        if assigned_values is None:
+            return
+        visible_ids = [
+            entry_id
+            for entry_id, assigned in enumerate(assigned_values)
+            if self._annotator_matches_filter(assigned)
+        ]
+        self._visible_entry_ids = tuple(visible_ids)
+        mask = bytearray(len(assigned_values))
+        for entry_id in visible_ids:
+            mask[entry_id] = 1
+        self._visible_mask = mask
 
     def _annotator_matches_filter(self, raw_value: Any) -> bool:
         if not self._allowed_annotators:
             return True
-        for token in self._split_annotator_values(raw_value):
+        if raw_value is None:
+            return False
+        text = str(raw_value).strip()
+        # A single name is by far the common case; only split when a delimiter is present.
+        if _ANNOTATOR_DELIMITERS.isdisjoint(text):
+            return text.lower() in self._allowed_annotators
+        for token in self._split_annotator_values(text):
             if token.lower() in self._allowed_annotators:
                 return True
         return False
@@ -90,76 +188,116 @@ class AnnotationDataStore:
         text = str(value).strip()
         if not text:
             return []
-        if any(delim in text for delim in (";", ",", "|", "\n")):
-            tokens = re.split(r"[;,|\n]+", text)
+        if not _ANNOTATOR_DELIMITERS.isdisjoint(text):
+            tokens = _ANNOTATOR_DELIMITER_RE.split(text)
         else:
             tokens = [text]
         return [token.strip() for token in tokens if token and token.strip()]
 
     def _seed_annotations_from_source(self) -> None:
-        for entry in self.entries:
-            row = entry["data"]
+        annotator_values = self._column_values(self.config.annotator_column)
+        # Every row has the same header, so decide once which annotation fields the dataset carries.
+        seed_columns = [
+            (field.name, self._columns[self._column_index[field.name]])
+            for field in self._annotation_fields
+            if field.name in self._column_index
+        ]
+        for entry_id in range(len(self._entry_urls)):
             prefilled: Dict[str, Any] = {}
-            for field in self.config.annotation_fields:
-                if field.name not in row:
-                    continue
-                raw_value = row.get(field.name)
-                if raw_value is None:
+            # Cells are str, or None for short rows.
+            for name, values in seed_columns:
+                raw_value = values[entry_id]
+                if not raw_value:
                     continue
-                value = raw_value.strip() if isinstance(raw_value, str) else raw_value
-                if value == "":
-                    continue
-                prefilled[field.name] = value
+                value = raw_value.strip()
+                if value:
+                    prefilled[name] = value
             if prefilled:
-                self.annotations[entry["id"]] = prefilled
-            if self.config.annotator_column:
-                annotator_value = row.get(self.config.annotator_column)
-                if annotator_value is None:
-                    continue
-                cleaned = annotator_value.strip() if isinstance(annotator_value, str) else annotator_value
+                self.annotations[entry_id] = prefilled
+            if annotator_values is not None:
+                annotator_value = annotator_values[entry_id]
+                cleaned = annotator_value.strip() if annotator_value else ""
                 if cleaned:
-                    self.annotators[entry["id"]] = str(cleaned)
+                    self.annotators[entry_id] = cleaned
 
     def _load_existing_annotations(self) -> None:
         output_path = self.config.annotation_output
         if not output_path.exists():
             return
         with output_path.open("r", encoding="utf-8", newline="") as fh:
-            reader = csv.DictReader(fh)
-            if not reader.fieldnames or ENTRY_ID_COLUMN not in reader.fieldnames:
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if not header or ENTRY_ID_COLUMN not in header:
                 return
-            for row in reader:
+            # Later duplicates win, as they did with csv.DictReader; absent columns read as "".
+            positions = {name: position for position, name in enumerate(header)}
+            entry_id_position = positions[ENTRY_ID_COLUMN]
+            field_positions = [(field.name, positions.get(field.name)) for field in self._annotation_fields]
+            annotator_column = self.config.annotator_column
+            annotator_position = positions.get(annotator_column) if annotator_column else None
+            width = len(header)
+            for values in reader:
+                if not values:
+                    continue
+                if len(values) < width:
+                    values += [None] * (width - len(values))
                 try:
-                    entry_id = int(row.get(ENTRY_ID_COLUMN, "").strip())
-                except ValueError:
+                    entry_id = int(values[entry_id_position].strip())
+                except (AttributeError, ValueError):
                     continue
-                annotation_values = {
-                    field.name: row.get(field.name, "")
-                    for field in self.config.annotation_fields
+                self.annotations[entry_id] = {
+                    name: values[position] if position is not None else ""
+                    for name, position in field_positions
                 }
-                self.annotations[entry_id] = annotation_values
-                if self.config.annotator_column:
-                    self.annotators[entry_id] = row.get(self.config.annotator_column, "")
+                if annotator_column:
+                    self.annotators[entry_id] = values[annotator_position] if annotator_position is not None else ""
+
+    def _replay_journal(self) -> int:
+        """Apply saves journaled since the last compaction on top of the output CSV."""
+        if not self._journal_path.exists():
+            return 0
+        replayed = 0
+        with self._journal_path.open("rb") as fh:
+            for line in fh:
+                try:
+                    record = orjson.loads(line)
+                    entry_id = int(record["entry_id"])
+                    values = record["values"]
+                except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue  # e.g. a torn final line after a crash
+                self.annotations[entry_id] = values
+                if self.config.annotator_column and "annotator" in record:
+                    self.annotators[entry_id] = record["annotator"]
+                replayed += 1
+        return replayed
 
-    def get_entry(self, entry_id: int) -> Dict[str, Any]:
-        if entry_id not in self._entry_map:
+    def get_entry(self, entry_id: int) -> Entry:
+        if not 0 <= entry_id < len(self._entry_urls):
             raise KeyError(f"Invalid entry id {entry_id}")
-        return self._entry_map[entry_id]
+        return Entry(entry_id, self._entry_urls[entry_id], self._row(entry_id))
 
-    def formatted_entries(self) -> List[Dict[str, Any]]:
-        entries = (
-            self.entries
-            if self._visible_entry_ids is None
-            else [self._entry_map[i] for i in self._visible_entry_ids if i in self._entry_map]
+    def _row(self, entry_id: int) -> RowView:
+        return RowView(self._column_index, self._columns, entry_id)
+
+    def _column_values(self, name: Optional[str]) -> Optional[List[Optional[str]]]:
+        """All values of one CSV column by entry id, or None if the column is not in the data."""
+        position = self._column_index.get(name) if name else None
+        return self._columns[position] if position is not None else None
+
+    def entries_client_json(self) -> bytes:
+        """Visible entries as JSON, encoded once at load since rows never change."""
+        return self._entries_json
+
+    def _build_entries_json(self) -> bytes:
+        # Straight from the columns: one short-lived dict per row, no wrapper views to convert.
+        names, urls = self.csv_fieldnames, self._entry_urls
+        rows = list(zip(*self._columns))
+        return orjson.dumps(
+            [
+                {"id": entry_id, "url": urls[entry_id], "data": dict(zip(names, rows[entry_id]))}
+                for entry_id in self._visible_entry_ids
+            ]
         )
-        return [
-            {
-                "id": entry["id"],
-                "url": entry["url"],
-                "data": entry["data"],
-            }
-            for entry in entries
-        ]
 
     def save_annotation(
         self, entry_id: int, payload: Dict[str, Any], annotator: Optional[str] = None
@@ -168,65 +306,192 @@ class AnnotationDataStore:
         if not self._is_entry_visible(entry_id):
             raise KeyError(f"Entry {entry_id} is not accessible in this configuration")
         prepared: Dict[str, Any] = {}
-        for field in self.config.annotation_fields:
+        for field in self._annotation_fields:
             value = payload.get(field.name)
             if isinstance(value, list):
                 prepared[field.name] = self._join_list(field, value)
             else:
                 prepared[field.name] = value if value is not None else ""
-        self.annotations[entry_id] = prepared
-        if self.config.annotator_column is not None:
-            self.annotators[entry_id] = annotator or ""
-        self._persist_annotations()
+        with self._lock:
+            self.annotations[entry_id] = prepared
+            self._client_annotations[entry_id] = prepared
+            if self.config.annotator_column is not None:
+                self.annotators[entry_id] = annotator or ""
+                self._client_annotators[entry_id] = annotator or ""
+            self._annotations_json = None
+            self._annotators_json = None
+            self.version += 1
+            self._dirty = True
+            record: Dict[str, Any] = {"entry_id": entry_id, "values": prepared, "ts": time.time()}
+            if self.config.annotator_column is not None:
+                record["annotator"] = annotator or ""
+            # Queued under the lock so journal order matches the order of in-memory updates.
+            self._ensure_writer()
+            self._writer_queue.put(record)
         return prepared
 
+    def close(self) -> None:
+        """Write out queued saves and fold the journal into the output CSV."""
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._writer_queue.put(None)
+            writer.join()
+        self._writer = None
+        self.compact()
+
+    def compact(self) -> None:
+        """Fold journaled saves into the output CSV."""
+        with self._io_lock:
+            if self._dirty or self._journaled_saves:
+                self._compact()
+
+    def _ensure_writer(self) -> None:
+        # Started lazily so a store built before a server forks gets its thread in the worker.
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, name="annotation-writer", daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self) -> None:
+        # Records whose journal write failed; retried ahead of newer ones so journal order holds.
+        pending: List[Dict[str, Any]] = []
+        while True:
+            try:
+                batch = [self._writer_queue.get(timeout=WRITER_RETRY_SECONDS if pending else None)]
+            except queue.Empty:
+                batch = []
+            deadline = time.monotonic() + WRITER_DEBOUNCE_SECONDS
+            while batch and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._writer_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            records = pending + [record for record in batch if record is not None]
+            try:
+                if records:
+                    self._write_journal(records)
+                pending = []
+            except OSError:
+                # The saves stay in memory and marked dirty, so close() still writes them to the CSV.
+                logger.exception("Could not append %d annotation(s) to %s; will retry", len(records), self._journal_path)
+                pending = records
+            finally:
+                for _ in batch:
+                    self._writer_queue.task_done()
+            if batch and batch[-1] is None:
+                return
+
+    def _write_journal(self, records: List[Dict[str, Any]]) -> None:
+        payload = b"".join(orjson.dumps(record) + b"\n" for record in records)
+        with self._io_lock:
+            self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._journal_path.open("ab") as fh:
+                start = fh.tell()
+                try:
+                    fh.write(payload)
+                    fh.flush()
+                except OSError:
+                    fh.truncate(start)  # do not leave a torn line ahead of the retried records
+                    raise
+            self._journaled_saves += len(records)
+            if self._journaled_saves >= JOURNAL_COMPACT_EVERY:
+                try:
+                    self._compact()
+                except OSError:
+                    # The journal already holds these records; compaction is retried on the next write.
+                    logger.exception("Could not rewrite %s", self.config.annotation_output)
+
+    def _compact(self) -> None:
+        with self._lock:
+            annotations = dict(self.annotations)
+            annotators = dict(self.annotators)
+            self._dirty = False
+        try:
+            self._persist_annotations(annotations, annotators)
+        except BaseException:
+            with self._lock:
+                self._dirty = True
+            raise
+        self._journal_path.unlink(missing_ok=True)
+        self._journaled_saves = 0
+
     def _join_list(self, field, values: List[str]) -> str:
         separator = field.separator or self.config.default_list_separator
         cleaned = [v.strip() for v in values if v.strip()]
         return separator.join(cleaned)
 
-    def _persist_annotations(self) -> None:
-        output_path = self.config.annotation_output
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        annotation_field_names = self.config.annotation_field_names()
-        header = [ENTRY_ID_COLUMN] + self.csv_fieldnames + annotation_field_names
+    def _build_output_layout(self) -> None:
+        """Compute the output CSV header and where each column's values come from; fixed after load."""
+        header = [ENTRY_ID_COLUMN, *self.csv_fieldnames, *(field.name for field in self._annotation_fields)]
         if self.config.annotator_column:
             header.append(self.config.annotator_column)
+        self._output_header = header
+        # Each output column starts from the dataset column of the same name (if any). Annotation
+        # values and the annotator then fill every column carrying their name, as csv.DictWriter did.
+        self._output_fill_columns = [
+            self._columns[self._column_index[name]] if name in self._column_index else None
+            for name in header[1:]
+        ]
+        self._output_positions = {}
+        for position, name in enumerate(header):
+            self._output_positions.setdefault(name, []).append(position)
 
-        with output_path.open("w", encoding="utf-8", newline="") as fh:
-            writer = csv.DictWriter(fh, fieldnames=header)
-            writer.writeheader()
-            for entry in self.entries:
-                row = {ENTRY_ID_COLUMN: entry["id"]}
-                row.update(entry["data"])
-                if entry["id"] in self.annotations:
-                    row.update(self.annotations[entry["id"]])
-                if self.config.annotator_column:
-                    row[self.config.annotator_column] = self.annotators.get(entry["id"], "")
+    def _persist_annotations(self, annotations: Dict[int, Dict[str, Any]], annotators: Dict[int, str]) -> None:
+        output_path = self.config.annotation_output
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        header = self._output_header
+        fill_columns = self._output_fill_columns
+        positions = self._output_positions
+        annotator_positions = positions[self.config.annotator_column] if self.config.annotator_column else []
+
+        # Write aside and swap in so a crash mid-write never leaves a truncated CSV behind.
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(header)
+            for entry_id in range(len(self._entry_urls)):
+                row: List[Any] = [entry_id]
+                row.extend(column[entry_id] if column is not None else "" for column in fill_columns)
+                for name, value in annotations.get(entry_id, {}).items():
+                    for position in positions.get(name, ()):
+                        row[position] = value
+                if annotator_positions:
+                    annotator = annotators.get(entry_id, "")
+                    for position in annotator_positions:
+                        row[position] = annotator
                 writer.writerow(row)
+        os.replace(tmp_path, output_path)
 
-    def annotations_for_client(self) -> Dict[str, Dict[str, Any]]:
-        if self._visible_entry_id_set is None:
-            return {str(key): value for key, value in self.annotations.items()}
-        return {
-            str(key): value
-            for key, value in self.annotations.items()
-            if key in self._visible_entry_id_set
+    def _seed_client_views(self) -> None:
+        """Visible subsets of the annotation maps; :meth:`save_annotation` keeps them current."""
+        self._client_annotations = {
+            key: value for key, value in self.annotations.items() if self._is_entry_visible(key)
         }
-
-    def annotators_for_client(self) -> Dict[str, str]:
-        if self._visible_entry_id_set is None:
-            return {str(key): value for key, value in self.annotators.items()}
-        return {
-            str(key): value
-            for key, value in self.annotators.items()
-            if key in self._visible_entry_id_set
+        self._client_annotators = {
+            key: value for key, value in self.annotators.items() if self._is_entry_visible(key)
         }
 
+    def annotations_client_json(self) -> bytes:
+        """Annotations of the visible entries as JSON, rebuilt only after a save."""
+        with self._lock:
+            if self._annotations_json is None:
+                self._annotations_json = orjson.dumps(self._client_annotations, option=orjson.OPT_NON_STR_KEYS)
+            return self._annotations_json
+
+    def annotators_client_json(self) -> bytes:
+        """Annotators of the visible entries as JSON, rebuilt only after a save."""
+        with self._lock:
+            if self._annotators_json is None:
+                self._annotators_json = orjson.dumps(self._client_annotators, option=orjson.OPT_NON_STR_KEYS)
+            return self._annotators_json
+
     def is_entry_visible(self, entry_id: int) -> bool:
         return self._is_entry_visible(entry_id)
 
     def _is_entry_visible(self, entry_id: int) -> bool:
-        if self._visible_entry_id_set is None:
+        mask = self._visible_mask
+        if mask is None:
             return True
-        return entry_id in self._visible_entry_id_set
+        return 0 <= entry_id < len(mask) and mask[entry_id] == 1
@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import Iterable
 
 from .cli import discover_configs
-from .playwright_launcher import launch
+from .playwright_launcher import DEFAULT_PROFILE_DIR, launch
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -33,6 +33,11 @@ def build_parser() -> argparse.ArgumentParser:
         default=[],
         help="Additional Chromium argument (repeatable)",
     )
+    parser.add_argument(
+        "--profile-dir",
+        default=str(DEFAULT_PROFILE_DIR),
+        help="Chromium profile directory kept between sessions",
+    )
     parser.add_argument("--debug", action="store_true", help="Enable PyWebView debug logging")
     parser.add_argument("--list-configs", action="store_true", help="List discovered configs and exit")
     return parser
@@ -75,6 +80,7 @@ def main(argv: Iterable[str] | None = None) -> None:
         chromium_path=args.chromium_path,
         extra_browser_args=args.extra_browser_arg,
         debug=args.debug,
+        profile_dir=args.profile_dir,
     )
 
 
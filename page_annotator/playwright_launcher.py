@@ -3,9 +3,10 @@ from __future__ import annotations
 import argparse
 import queue
 import threading
-import time
 import webbrowser
-from typing import Dict, Optional
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
 
 import webview
 from playwright.sync_api import sync_playwright
@@ -13,6 +14,11 @@ from werkzeug.serving import make_server
 
 from page_annotator.app import create_app
 
+# Chromium profile reused across sessions so its HTTP and DNS caches survive restarts.
+DEFAULT_PROFILE_DIR = Path.home() / ".cache" / "page_annotator" / "playwright-profile"
+# Addresses the server can listen on but the windows cannot load from.
+_WILDCARD_HOSTS = frozenset({"0.0.0.0", "::"})
+
 
 class FlaskServerThread(threading.Thread):
     """Run the Flask app in a background thread so Playwright can host the viewer."""
@@ -21,16 +27,21 @@ class FlaskServerThread(threading.Thread):
         super().__init__(daemon=True)
         overrides: Dict[str, Dict[str, bool]] = {"viewer": {"detached_window": True}}
         app = create_app(config_path, overrides=overrides)
-        self._server = make_server(host, port, app)
-        self._ctx = app.app_context()
-        self._ctx.push()
+        # The annotation window's polls and saves must not queue behind each other, so serve concurrently.
+        # make_server binds the socket here, so connections are accepted as soon as run() starts.
+        self._server = make_server(host, port, app, threaded=True)
+        self._app = app
+        base_host = "127.0.0.1" if host in _WILDCARD_HOSTS else host
+        self.base_url = f"http://{base_host}:{port}"
+        self.ready = threading.Event()
 
     def run(self) -> None:
-        self._server.serve_forever()
+        with self._app.app_context():
+            self.ready.set()
+            self._server.serve_forever()
 
     def shutdown(self) -> None:
         self._server.shutdown()
-        self._ctx.pop()
 
 
 def parse_args() -> argparse.ArgumentParser:
@@ -53,6 +64,11 @@ def parse_args() -> argparse.ArgumentParser:
         default=[],
         help="Additional Chromium argument (repeatable).",
     )
+    parser.add_argument(
+        "--profile-dir",
+        default=str(DEFAULT_PROFILE_DIR),
+        help="Chromium profile directory kept between sessions.",
+    )
     parser.add_argument("--debug", action="store_true", help="Enable PyWebView debug logging.")
     return parser
 
@@ -76,6 +92,48 @@ def compute_layout(
     }
 
 
+# Installed once per page with add_init_script, so each search only sends the term over CDP.
+_SEARCH_JS = """
+window.__pageAnnotatorSearch = (term, forward) => {
+  try {
+    if (!term) return false;
+    const backwards = !forward;
+    if (!window.find(term, false, backwards, true, false, true, false)) {
+      return false;
+    }
+    const styleId = "__playwright-search-highlight";
+    if (!document.getElementById(styleId)) {
+      const style = document.createElement("style");
+      style.id = styleId;
+      style.textContent = "mark.__playwright-search-hit { background:#f97316; color:#fff; padding:0 2px; border-radius:2px; }";
+      document.head && document.head.appendChild(style);
+    }
+    const selection = window.getSelection();
+    if (!selection || selection.rangeCount === 0) {
+      return true;
+    }
+    const range = selection.getRangeAt(0).cloneRange();
+    const mark = document.createElement("mark");
+    mark.className = "__playwright-search-hit";
+    mark.textContent = range.toString();
+    range.deleteContents();
+    range.insertNode(mark);
+    mark.scrollIntoView({behavior: "smooth", block: "center"});
+    setTimeout(() => {
+      if (mark && mark.parentNode) {
+        const textNode = document.createTextNode(mark.textContent);
+        mark.parentNode.replaceChild(textNode, mark);
+      }
+    }, 1500);
+    return true;
+  } catch (err) {
+    return false;
+  }
+};
+"""
+_SEARCH_CALL = "([term, forward]) => window.__pageAnnotatorSearch(term, forward)"
+
+
 class PlaywrightController:
     def __init__(self, page):
         self.page = page
@@ -116,46 +174,8 @@ class PlaywrightController:
     def search_page(self, term: str, forward: bool = True) -> bool:
         if not term:
             return False
-        script = """
-        (term, forward) => {
-          try {
-            if (!term) return false;
-            const backwards = !forward;
-            if (!window.find(term, false, backwards, true, false, true, false)) {
-              return false;
-            }
-            const styleId = "__playwright-search-highlight";
-            if (!document.getElementById(styleId)) {
-              const style = document.createElement("style");
-              style.id = styleId;
-              style.textContent = "mark.__playwright-search-hit { background:#f97316; color:#fff; padding:0 2px; border-radius:2px; }";
-              document.head && document.head.appendChild(style);
-            }
-            const selection = window.getSelection();
-            if (!selection || selection.rangeCount === 0) {
-              return true;
-            }
-            const range = selection.getRangeAt(0).cloneRange();
-            const mark = document.createElement("mark");
-            mark.className = "__playwright-search-hit";
-            mark.textContent = range.toString();
-            range.deleteContents();
-            range.insertNode(mark);
-            mark.scrollIntoView({behavior: "smooth", block: "center"});
-            setTimeout(() => {
-              if (mark && mark.parentNode) {
-                const textNode = document.createTextNode(mark.textContent);
-                mark.parentNode.replaceChild(textNode, mark);
-              }
-            }, 1500);
-            return true;
-          } catch (err) {
-            return false;
-          }
-        }
-        """
         try:
-            return bool(self.page.evaluate(script, term, forward))
+            return bool(self.page.evaluate(_SEARCH_CALL, [term, forward]))
         except Exception:
             return False
 
@@ -166,11 +186,13 @@ class PlaywrightWorker(threading.Thread):
         layout: Dict[str, int],
         chromium_path: Optional[str],
         extra_args: Optional[list[str]],
+        profile_dir: Path | str = DEFAULT_PROFILE_DIR,
     ):
         super().__init__(daemon=True)
         self.layout = layout
         self.chromium_path = chromium_path
         self.extra_args = extra_args or []
+        self.profile_dir = Path(profile_dir).expanduser()
         self.queue: queue.Queue = queue.Queue()
         self.ready = threading.Event()
         self.stopped = threading.Event()
@@ -188,21 +210,35 @@ class PlaywrightWorker(threading.Thread):
             browser_kwargs = {"headless": False, "args": viewer_args}
             if self.chromium_path:
                 browser_kwargs["executable_path"] = self.chromium_path
-            browser = playwright.chromium.launch(**browser_kwargs)
-            page = browser.new_page()
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            context = playwright.chromium.launch_persistent_context(str(self.profile_dir), **browser_kwargs)
+            context.add_init_script(_SEARCH_JS)
+            page = context.pages[0] if context.pages else context.new_page()
             controller = PlaywrightController(page)
             self.ready.set()
+            pending: Deque[Tuple[str, tuple, queue.Queue]] = deque()
             while True:
-                command, args, response = self.queue.get()
+                if not pending:
+                    pending.append(self.queue.get())
+                # Pick up everything queued meanwhile so navigations superseded by a newer one are skipped.
+                while True:
+                    try:
+                        pending.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                command, args, response = pending.popleft()
                 if command == "__quit__":
                     response.put(True)
                     break
+                if command == "show_entry" and any(item[0] == "show_entry" for item in pending):
+                    response.put(True)
+                    continue
                 try:
                     result = getattr(controller, command)(*args)
                 except Exception:
                     result = False
                 response.put(result)
-            browser.close()
+            context.close()
         self.stopped.set()
 
     def call(self, method: str, *args):
@@ -213,9 +249,14 @@ class PlaywrightWorker(threading.Thread):
         return response.get()
 
     def stop(self) -> None:
+        if not self.is_alive():
+            return
         response: queue.Queue = queue.Queue()
         self.queue.put(("__quit__", (), response))
-        response.get()
+        try:
+            response.get(timeout=15)
+        except queue.Empty:
+            pass
         self.join(timeout=5)
 
 
@@ -241,22 +282,6 @@ class PlaywrightBridge:
         return self.worker.call("search_page", term, forward)
 
 
-def wait_for_server(base_url: str, timeout: float = 15.0) -> bool:
-    import requests
-
-    deadline = time.time() + timeout
-    probe = f"{base_url.rstrip('/')}/api/state"
-    while time.time() < deadline:
-        try:
-            resp = requests.get(probe, timeout=2)
-            if resp.ok:
-                return True
-        except requests.RequestException:
-            pass
-        time.sleep(0.3)
-    return False
-
-
 def launch(
     config: str = "config.yaml",
     host: str = "127.0.0.1",
@@ -270,19 +295,34 @@ def launch(
     chromium_path: Optional[str] = None,
     extra_browser_args: Optional[list[str]] = None,
     debug: bool = False,
+    profile_dir: Path | str = DEFAULT_PROFILE_DIR,
 ) -> None:
     layout = compute_layout(viewer_width, viewer_height, panel_height, offset_x, offset_y, vertical_gap)
+    # Chromium starts while the dataset loads; the viewer only needs the server once an entry is shown.
+    worker = PlaywrightWorker(layout, chromium_path, extra_browser_args, profile_dir)
+    worker.start()
+    try:
+        _run_windows(worker, layout, config, host, port, debug)
+    finally:
+        worker.stop()
+
+
+def _run_windows(
+    worker: PlaywrightWorker,
+    layout: Dict[str, int],
+    config: str,
+    host: str,
+    port: int,
+    debug: bool,
+) -> None:
     server = FlaskServerThread(config, host, port)
     server.start()
-    base_host = "127.0.0.1" if host in {"0.0.0.0", "::"} else host
-    base_url = f"http://{base_host}:{port}"
-    if not wait_for_server(base_url):
+    base_url = server.base_url
+    if not server.ready.wait(timeout=15.0):
         server.shutdown()
         raise SystemExit("The Flask backend did not start in time.")
 
     try:
-        worker = PlaywrightWorker(layout, chromium_path, extra_browser_args)
-        worker.start()
         if not worker.ready.wait(timeout=10):
             raise RuntimeError("Playwright viewer failed to start")
 
@@ -300,10 +340,7 @@ def launch(
             js_api=bridge,
         )
 
-        try:
-            webview.start(debug=debug)
-        finally:
-            worker.stop()
+        webview.start(debug=debug)
     finally:
         server.shutdown()
 
@@ -324,6 +361,7 @@ def main() -> None:
         chromium_path=args.chromium_path,
         extra_browser_args=args.extra_browser_arg,
         debug=args.debug,
+        profile_dir=args.profile_dir,
     )
 
 
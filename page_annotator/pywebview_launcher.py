@@ -2,36 +2,47 @@ from __future__ import annotations
 
 import argparse
 import json
+import queue
+import string
 import threading
-import time
-import webbrowser
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
 
-import requests
 import webview
-from werkzeug.serving import make_server
-
-from page_annotator.app import create_app
 
 webview.settings['ALLOW_DOWNLOADS'] = True
 
+_SEARCH_TEMPLATE = string.Template("window.find($term, false, $backwards, true, false, true, false);")
+# Addresses the server can listen on but the windows cannot load from.
+_WILDCARD_HOSTS = frozenset({"0.0.0.0", "::"})
+
 class FlaskServerThread(threading.Thread):
     """Run the Flask app in a background thread so PyWebView can host the UI."""
 
     def __init__(self, config_path: str, host: str, port: int):
         super().__init__(daemon=True)
+        # Deferred so ``--help`` and layout helpers do not pay for importing Flask and the proxy stack.
+        from werkzeug.serving import make_server
+
+        from page_annotator.app import create_app
+
         overrides: Dict[str, Dict[str, bool]] = {"viewer": {"detached_window": True}}
         app = create_app(config_path, overrides=overrides)
-        self._server = make_server(host, port, app)
-        self._ctx = app.app_context()
-        self._ctx.push()
+        # Both windows hit the backend at once (state polls, saves, proxied pages), so serve concurrently.
+        # make_server binds the socket here, so connections are accepted as soon as run() starts.
+        self._server = make_server(host, port, app, threaded=True)
+        self._app = app
+        base_host = "127.0.0.1" if host in _WILDCARD_HOSTS else host
+        self.base_url = f"http://{base_host}:{port}"
+        self.ready = threading.Event()
 
     def run(self) -> None:
-        self._server.serve_forever()
+        with self._app.app_context():
+            self.ready.set()
+            self._server.serve_forever()
 
     def shutdown(self) -> None:
         self._server.shutdown()
-        self._ctx.pop()
 
 
 class ViewerBridge:
@@ -40,6 +51,10 @@ class ViewerBridge:
     def __init__(self, viewer_window: webview.Window):
         self.viewer_window = viewer_window
         self.default_title = "Page Viewer"
+        # run_js still waits for the GUI thread, so scripts go through a daemon dispatcher instead;
+        # a single thread keeps them in order (e.g. two quick history.back() presses).
+        self._js_queue: queue.Queue = queue.Queue()
+        threading.Thread(target=self._dispatch_js, daemon=True).start()
 
     def show_entry(self, payload: Dict[str, str] | None = None) -> bool:
         if not payload:
@@ -52,17 +67,19 @@ class ViewerBridge:
         return self._load_url(url, title)
 
     def browser_back(self) -> bool:
-        return self._evaluate_js("history.back();")
+        return self._run_js("history.back();")
 
     def browser_forward(self) -> bool:
-        return self._evaluate_js("history.forward();")
+        return self._run_js("history.forward();")
 
     def reload_page(self) -> bool:
-        return self._evaluate_js("history.go(0);")
+        return self._run_js("history.go(0);")
 
     def open_external(self, url: str) -> bool:
         if not url:
             return False
+        import webbrowser
+
         try:
             webbrowser.open(url)
             return True
@@ -76,55 +93,8 @@ class ViewerBridge:
             query = json.dumps(term)
         except Exception:
             query = json.dumps(str(term))
-        backwards = "true" if not forward else "false"
-        script = f"""
-(function() {{
-  try {{
-    var term = {query};
-    if (!term) return false;
-    var backwards = {backwards};
-    var found = window.find(term, false, backwards, true, false, true, false);
-    if (!found) return false;
-    var styleId = "__annotator-search-style";
-    if (!document.getElementById(styleId)) {{
-      var style = document.createElement("style");
-      style.id = styleId;
-      style.textContent = "mark.__annotator-search-hit {{ background:#f97316; color:#fff; padding:0 2px; border-radius:2px; }}";
-      document.head && document.head.appendChild(style);
-    }}
-    var selection = window.getSelection();
-    if (!selection || selection.rangeCount === 0) return true;
-    var activeRange = selection.getRangeAt(0).cloneRange();
-    var mark = document.createElement("mark");
-    mark.className = "__annotator-search-hit";
-    mark.textContent = activeRange.toString();
-    activeRange.deleteContents();
-    activeRange.insertNode(mark);
-    mark.scrollIntoView({{behavior: "smooth", block: "center"}});
-    window.setTimeout(function() {{
-      if (mark && mark.parentNode) {{
-        var textNode = document.createTextNode(mark.textContent);
-        mark.parentNode.replaceChild(textNode, mark);
-      }}
-    }}, 1500);
-    return true;
-  }} catch (err) {{
-    return false;
-  }}
-}})();
-"""
-        return self._evaluate_js(script)
-
-    def search_page(self, term: str, forward: bool = True) -> bool:
-        if not term:
-            return False
-        try:
-            query = json.dumps(term)
-        except Exception:
-            query = json.dumps(str(term))
-        backwards = "false" if forward else "true"
-        script = f"window.find({query}, false, {backwards}, true, false, true, false);"
-        return self._evaluate_js(script)
+        script = _SEARCH_TEMPLATE.substitute(term=query, backwards="false" if forward else "true")
+        return self._run_js(script)
 
     def _load_url(self, url: str | None, title: str | None) -> bool:
         if not url:
@@ -138,26 +108,17 @@ class ViewerBridge:
         except Exception:
             return False
 
-    def _evaluate_js(self, script: str) -> bool:
-        try:
-            self.viewer_window.evaluate_js(script)
-            return True
-        except Exception:
-            return False
+    def _run_js(self, script: str) -> bool:
+        self._js_queue.put(script)
+        return True
 
-
-def wait_for_server(base_url: str, timeout: float = 15.0) -> bool:
-    deadline = time.time() + timeout
-    probe_url = f"{base_url.rstrip('/')}/api/state"
-    while time.time() < deadline:
-        try:
-            resp = requests.get(probe_url, timeout=2)
-            if resp.ok:
-                return True
-        except requests.RequestException:
-            pass
-        time.sleep(0.3)
-    return False
+    def _dispatch_js(self) -> None:
+        while True:
+            script = self._js_queue.get()
+            try:
+                self.viewer_window.run_js(script)
+            except Exception:
+                pass
 
 
 def parse_args() -> argparse.Namespace:
@@ -176,19 +137,47 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def compute_window_layout(params: Dict[str, int]) -> Dict[str, int]:
+class LayoutParams(NamedTuple):
+    viewer_width: int
+    viewer_height: int
+    panel_height: int
+    offset_x: int
+    offset_y: int
+    vertical_gap: int
+
+
+class WindowLayout(NamedTuple):
+    width: int
+    viewer_height: int
+    panel_height: int
+    gap: int
+    offset_x: int
+    viewer_y: int
+    panel_y: int
+
+
+def compute_window_layout(params: LayoutParams) -> WindowLayout:
     screen = webview.screens[0] if getattr(webview, "screens", None) else None
-    width = params["viewer_width"]
-    viewer_height = params["viewer_height"]
-    panel_height = params["panel_height"]
-    gap = params["vertical_gap"]
-    offset_x = params["offset_x"]
-    offset_y = params["offset_y"]
+    screen_key = (screen.x, screen.y, screen.width, screen.height) if screen else None
+    return _layout_for_screen(params, screen_key)
+
+
+@lru_cache(maxsize=8)
+def _layout_for_screen(
+    params: LayoutParams, screen: Optional[Tuple[int, int, int, int]]
+) -> WindowLayout:
+    width = params.viewer_width
+    viewer_height = params.viewer_height
+    panel_height = params.panel_height
+    gap = params.vertical_gap
+    offset_x = params.offset_x
+    offset_y = params.offset_y
 
     if screen:
+        screen_x, screen_y, screen_width, screen_height = screen
         safe_margin = 80
-        available_width = max(600, screen.width - 40)
-        available_height = max(400, screen.height - safe_margin)
+        available_width = max(600, screen_width - 40)
+        available_height = max(400, screen_height - safe_margin)
         if width > available_width:
             width = available_width
         total_height = viewer_height + gap + panel_height
@@ -198,37 +187,51 @@ def compute_window_layout(params: Dict[str, int]) -> Dict[str, int]:
             panel_height = max(260, int(panel_height * scale))
             gap = max(6, int(gap * scale))
             total_height = viewer_height + gap + panel_height
-        min_x = screen.x + 20
-        max_x = screen.x + screen.width - width - 20
+        min_x = screen_x + 20
+        max_x = screen_x + screen_width - width - 20
         offset_x = max(min_x, min(offset_x, max_x))
-        min_y = screen.y + 20
-        max_y = screen.y + screen.height - total_height - 20
+        min_y = screen_y + 20
+        max_y = screen_y + screen_height - total_height - 20
         if max_y < min_y:
             max_y = min_y
         offset_y = max(min_y, min(offset_y, max_y))
 
-    return {
-        "width": width,
-        "viewer_height": viewer_height,
-        "panel_height": panel_height,
-        "gap": gap,
-        "offset_x": offset_x,
-        "viewer_y": offset_y,
-        "panel_y": offset_y + viewer_height + gap,
-    }
-
-
-def arrange_windows(viewer: webview.Window, annotator: webview.Window, layout: Dict[str, int]) -> None:
-    width = layout["width"]
-    viewer_height = layout["viewer_height"]
-    panel_height = layout["panel_height"]
-    offset_x = layout["offset_x"]
-    viewer_y = layout["viewer_y"]
-    panel_y = layout["panel_y"]
-    viewer.resize(width, viewer_height)
-    viewer.move(offset_x, viewer_y)
-    annotator.resize(width, panel_height)
-    annotator.move(offset_x, panel_y)
+    return WindowLayout(
+        width=width,
+        viewer_height=viewer_height,
+        panel_height=panel_height,
+        gap=gap,
+        offset_x=offset_x,
+        viewer_y=offset_y,
+        panel_y=offset_y + viewer_height + gap,
+    )
+
+
+def arrange_windows(
+    viewer: webview.Window,
+    annotator: webview.Window,
+    layout: WindowLayout,
+    current: Optional[WindowLayout] = None,
+) -> None:
+    """Apply ``layout``, skipping resize/move calls whose geometry already matches ``current``."""
+    width, viewer_height, panel_height, _, offset_x, viewer_y, panel_y = layout
+    # Every call is a round-trip to the GUI thread, so only send the ones that change something.
+    if current is None:
+        viewer.resize(width, viewer_height)
+        viewer.move(offset_x, viewer_y)
+        annotator.resize(width, panel_height)
+        annotator.move(offset_x, panel_y)
+        return
+    resized = width != current.width
+    moved = offset_x != current.offset_x
+    if resized or viewer_height != current.viewer_height:
+        viewer.resize(width, viewer_height)
+    if moved or viewer_y != current.viewer_y:
+        viewer.move(offset_x, viewer_y)
+    if resized or panel_height != current.panel_height:
+        annotator.resize(width, panel_height)
+    if moved or panel_y != current.panel_y:
+        annotator.move(offset_x, panel_y)
 
 
 def launch(
@@ -244,31 +247,23 @@ def launch(
     gui: Optional[str] = None,
     debug: bool = False,
 ) -> None:
-    params = {
-        "viewer_width": viewer_width,
-        "viewer_height": viewer_height,
-        "panel_height": panel_height,
-        "offset_x": offset_x,
-        "offset_y": offset_y,
-        "vertical_gap": vertical_gap,
-    }
+    params = LayoutParams(viewer_width, viewer_height, panel_height, offset_x, offset_y, vertical_gap)
     layout = compute_window_layout(params)
     server = FlaskServerThread(config, host, port)
     server.start()
-    base_host = "127.0.0.1" if host in {"0.0.0.0", "::"} else host
-    base_url = f"http://{base_host}:{port}"
+    base_url = server.base_url
 
-    if not wait_for_server(base_url):
+    if not server.ready.wait(timeout=15.0):
         server.shutdown()
         raise SystemExit("The Flask backend did not start in time.")
 
     viewer_window = webview.create_window(
         "Page Viewer",
         url="about:blank",
-        width=layout["width"],
-        height=layout["viewer_height"],
-        x=layout["offset_x"],
-        y=layout["viewer_y"],
+        width=layout.width,
+        height=layout.viewer_height,
+        x=layout.offset_x,
+        y=layout.viewer_y,
         resizable=True,
         text_select=True,
         min_size=(480, 320),
@@ -277,10 +272,10 @@ def launch(
     annotator_window = webview.create_window(
         "Page Annotator",
         url=base_url,
-        width=layout["width"],
-        height=layout["panel_height"],
-        x=layout["offset_x"],
-        y=layout["panel_y"],
+        width=layout.width,
+        height=layout.panel_height,
+        x=layout.offset_x,
+        y=layout.panel_y,
         resizable=True,
         on_top=True,
         min_size=(480, 240),
@@ -288,7 +283,11 @@ def launch(
     )
 
     def on_startup():
-        arrange_windows(viewer_window, annotator_window, layout)
+        # Screens may only be known once the GUI is up; the windows were created with ``layout``.
+        final_layout = compute_window_layout(params)
+        if final_layout == layout:
+            return
+        arrange_windows(viewer_window, annotator_window, final_layout, current=layout)
 
     try:
         webview.start(on_startup, gui=gui, debug=debug, user_agent=None)
@@ -28,12 +28,18 @@ const state = {
   pendingViewerPayload: null,
   fullPanelMode: false,
   lastSearchQuery: "",
+  frameStatus: {},
+  frameStatusPending: new Set(),
 };
 
 const dom = {};
 const STORAGE_KEYS = {
   annotator: "pageAnnotatorName",
 };
+// Upcoming entries whose embedding status is probed ahead of navigation.
+const FRAME_PREFETCH_AHEAD = 5;
+// Matches the server-side frame status TTL; older results are probed again.
+const FRAME_STATUS_TTL_MS = 5 * 60 * 1000;
 
 function getAppOrigin() {
   if (window.location.origin) {
@@ -549,6 +555,7 @@ function loadEntry(index) {
   updateFrameSource(entry);
   updateEntryAnnotatorBadge(entry.id);
   setStatus("");
+  prefetchFrameStatuses(state.currentIndex);
 }
 
 function renderInfo(entry) {
@@ -1117,16 +1124,57 @@ function sendViewerSearch(query, forward = true) {
   }
 }
 
-async function probeEmbeddingHeaders(entryId) {
+function getFreshFrameStatus(entryId) {
+  const cached = state.frameStatus[String(entryId)];
+  if (!cached || Date.now() - cached.fetchedAt > FRAME_STATUS_TTL_MS) return null;
+  return cached.payload;
+}
+
+function rememberFrameStatus(entryId, payload) {
+  state.frameStatus[String(entryId)] = { payload, fetchedAt: Date.now() };
+}
+
+async function prefetchFrameStatuses(index) {
   if (state.config.viewer?.auto_proxy_on_block === false) return;
-  const currentEntry = state.entries[state.currentIndex];
-  if (!currentEntry || entryId !== currentEntry.id) return;
+  if (state.config.viewer?.detached_window) return;
+  const ids = state.entries
+    .slice(index + 1, index + 1 + FRAME_PREFETCH_AHEAD)
+    .map((entry) => entry.id)
+    .filter((entryId) => !state.frameStatusPending.has(entryId) && !getFreshFrameStatus(entryId));
+  if (!ids.length) return;
+  ids.forEach((entryId) => state.frameStatusPending.add(entryId));
   try {
-    const response = await fetch(`/api/frame-check/${entryId}`);
+    const response = await fetch(`/api/frame-check-batch?ids=${ids.join(",")}`);
     if (!response.ok) {
       return;
     }
     const payload = await response.json();
+    Object.entries(payload).forEach(([entryId, status]) => {
+      if (status && typeof status.blocked === "boolean") {
+        rememberFrameStatus(entryId, status);
+      }
+    });
+  } catch (err) {
+    console.debug("Frame header batch probe failed", err);
+  } finally {
+    ids.forEach((entryId) => state.frameStatusPending.delete(entryId));
+  }
+}
+
+async function probeEmbeddingHeaders(entryId) {
+  if (state.config.viewer?.auto_proxy_on_block === false) return;
+  const currentEntry = state.entries[state.currentIndex];
+  if (!currentEntry || entryId !== currentEntry.id) return;
+  try {
+    let payload = getFreshFrameStatus(entryId);
+    if (!payload) {
+      const response = await fetch(`/api/frame-check/${entryId}`);
+      if (!response.ok) {
+        return;
+      }
+      payload = await response.json();
+      rememberFrameStatus(entryId, payload);
+    }
     if (entryId !== state.entries[state.currentIndex]?.id) return;
     if (!state.useProxy && payload.blocked) {
       handleFrameFailure(entryId, payload.reason || "blocked");
@@ -0,0 +1,16 @@
+"""WSGI entry point for serving the app with an external server.
+
+The config path is read from ``PAGE_ANNOTATOR_CONFIG`` (default: ``config.yaml``), e.g.::
+
+    PAGE_ANNOTATOR_CONFIG=config.yaml gunicorn -k gevent -w 1 --worker-connections 1000 page_annotator.wsgi:app
+
+Keep a single worker: annotations are held in the worker's memory and journaled by it.
+"""
+
+from __future__ import annotations
+
+import os
+
+from .app import create_app
+
+app = create_app(os.environ.get("PAGE_ANNOTATOR_CONFIG", "config.yaml"))
@@ -0,0 +1,17 @@
+"""Optional mypyc build of ``page_annotator/_fast.py``.
+
+Package metadata lives in pyproject.toml. Set ``PAGE_ANNOTATOR_MYPYC=1`` (with mypy installed and
+``--no-build-isolation``) to compile the proxy helpers; otherwise the pure-Python module ships as is.
+"""
+
+import os
+
+from setuptools import setup
+
+ext_modules = []
+if os.environ.get("PAGE_ANNOTATOR_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(["page_annotator/_fast.py"])
+
+setup(ext_modules=ext_modules)
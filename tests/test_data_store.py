@@ -0,0 +1,131 @@
+import csv
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import orjson
+
+from page_annotator import data_store
+from page_annotator.configuration import AppConfig
+from page_annotator.data_store import ENTRY_ID_COLUMN, AnnotationDataStore
+
+# Duplicate "title" header, a short row and an annotation field that is also a dataset column.
+DATASET = "url,title,relevance,title,annotator\nhttp://a,A,High,A2,bob\nhttp://b,B\nhttp://c,C,,C2,carol\n"
+CONFIG = """data_file: data.csv
+annotation_output: out.csv
+annotator_column: annotator
+viewer: {url_column: url}
+annotation_fields:
+  - {name: relevance, label: Relevance}
+  - {name: notes, label: Notes}
+"""
+
+
+class AnnotationJournalTests(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        (self.root / "data.csv").write_text(DATASET)
+        (self.root / "config.yaml").write_text(CONFIG)
+        self.output = self.root / "out.csv"
+        self.journal = self.root / "out.jsonl"
+
+    def _store(self) -> AnnotationDataStore:
+        store = AnnotationDataStore(AppConfig.load(self.root / "config.yaml"))
+        self.addCleanup(store.close)
+        return store
+
+    def _output_rows(self):
+        with self.output.open(newline="", encoding="utf-8") as fh:
+            return list(csv.reader(fh))
+
+    def _journal_lines(self):
+        return self.journal.read_bytes().splitlines()
+
+    def test_save_appends_one_journal_line(self):
+        store = self._store()
+        store.save_annotation(1, {"relevance": "Low", "notes": "n"}, annotator="zed")
+        store._writer_queue.join()
+        lines = self._journal_lines()
+        self.assertEqual(len(lines), 1)
+        record = orjson.loads(lines[0])
+        self.assertEqual(record["entry_id"], 1)
+        self.assertEqual(record["values"], {"relevance": "Low", "notes": "n"})
+        self.assertEqual(record["annotator"], "zed")
+
+    def test_fresh_store_replays_and_removes_the_journal(self):
+        store = self._store()
+        store.save_annotation(2, {"relevance": "Medium", "notes": "later"}, annotator="amy")
+        store._writer_queue.join()
+        self.assertTrue(self.journal.exists())
+
+        reloaded = self._store()
+        self.assertEqual(reloaded.annotations[2], {"relevance": "Medium", "notes": "later"})
+        self.assertEqual(reloaded.annotators[2], "amy")
+        self.assertFalse(self.journal.exists())
+        self.assertIn("later", self.output.read_text())
+
+    def test_torn_final_line_is_skipped(self):
+        self._store()
+        good = orjson.dumps({"entry_id": 0, "values": {"relevance": "Low", "notes": "ok"}, "annotator": "bob"})
+        self.journal.write_bytes(good + b"\n" + good[: len(good) // 2])
+
+        reloaded = self._store()
+        self.assertEqual(reloaded.annotations[0], {"relevance": "Low", "notes": "ok"})
+        self.assertFalse(self.journal.exists())
+
+    def test_compaction_runs_every_journal_compact_every_saves(self):
+        with mock.patch.object(data_store, "JOURNAL_COMPACT_EVERY", 3):
+            store = self._store()
+            for entry_id in range(2):
+                store.save_annotation(entry_id, {"relevance": "Low", "notes": f"n{entry_id}"})
+            store._writer_queue.join()
+            self.assertEqual(len(self._journal_lines()), 2)
+
+            store.save_annotation(2, {"relevance": "Low", "notes": "n2"})
+            store._writer_queue.join()
+        self.assertFalse(self.journal.exists())
+        notes = [row[-2] for row in self._output_rows()[1:]]
+        self.assertEqual(notes, ["n0", "n1", "n2"])
+
+    def test_close_drains_queued_saves_before_compacting(self):
+        store = self._store()
+        for entry_id in range(3):
+            store.save_annotation(entry_id, {"relevance": "High", "notes": f"queued{entry_id}"})
+        writer = store._writer
+        store.close()
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(store._writer_queue.unfinished_tasks, 0)
+        self.assertFalse(self.journal.exists())
+        notes = [row[-2] for row in self._output_rows()[1:]]
+        self.assertEqual(notes, ["queued0", "queued1", "queued2"])
+
+    def test_output_matches_dict_writer(self):
+        store = self._store()
+        store.save_annotation(1, {"relevance": "Low", "notes": "short row"}, annotator="zed")
+        store.close()
+
+        # What csv.DictWriter wrote before the column store: DictReader rows (last duplicate wins,
+        # missing cells None) updated with the annotations and annotator.
+        with (self.root / "data.csv").open(newline="", encoding="utf-8") as fh:
+            reader = csv.DictReader(fh)
+            source_rows = list(reader)
+            fieldnames = list(reader.fieldnames)
+        header = [ENTRY_ID_COLUMN, *fieldnames, "relevance", "notes", "annotator"]
+        expected = io.StringIO(newline="")
+        writer = csv.DictWriter(expected, fieldnames=header)
+        writer.writeheader()
+        for entry_id, source in enumerate(source_rows):
+            row = {ENTRY_ID_COLUMN: entry_id, **source}
+            row.update(store.annotations.get(entry_id, {}))
+            row["annotator"] = store.annotators.get(entry_id, "")
+            writer.writerow(row)
+        with self.output.open(newline="", encoding="utf-8") as fh:
+            self.assertEqual(fh.read(), expected.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
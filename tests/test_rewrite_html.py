@@ -0,0 +1,60 @@
+import unittest
+
+import requests
+
+from page_annotator.app import _rewrite_html, _rewrite_html_fast
+
+BASE_URL = "https://ex.com/dir/page.html"
+
+
+def _response(body: str) -> requests.Response:
+    response = requests.Response()
+    response._content = body.encode("utf-8")
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    return response
+
+
+def _rewrite(body: str) -> str:
+    return _rewrite_html_fast(BASE_URL, _response(body)).decode("utf-8")
+
+
+class RewriteHtmlFastTests(unittest.TestCase):
+    def test_raw_text_and_comments_are_left_untouched(self):
+        script = """<script src="app.js">var s="<img src='q.png'>"; var t = a && b;</script>"""
+        style = "<style>/* <a href='x.css'> */</style>"
+        comment = "<!-- <img src=old.png> -->"
+        textarea = "<textarea><a href='draft.html'></textarea>"
+        rewritten = _rewrite(f"<html><head>{script}{style}</head><body>{comment}{textarea}</body></html>")
+        self.assertIn("""<script src="https://ex.com/dir/app.js">var s="<img src='q.png'>"; var t = a && b;</script>""", rewritten)
+        self.assertIn(style, rewritten)
+        self.assertIn(comment, rewritten)
+        self.assertIn(textarea, rewritten)
+
+    def test_original_quote_character_is_kept(self):
+        rewritten = _rewrite(
+            """<html><head></head><body><img src='a.png' alt="x"><a href="b.html">b</a><img src=c.png></body></html>"""
+        )
+        self.assertIn("""<img src='https://ex.com/dir/a.png' alt="x">""", rewritten)
+        self.assertIn("""<a href="https://ex.com/dir/b.html">""", rewritten)
+        self.assertIn("""<img src="https://ex.com/dir/c.png">""", rewritten)
+
+    def test_unclosed_tags_fall_back_to_the_parser(self):
+        body = "<html><head></head><body>" + "<a x" * 30000
+        self.assertIsNone(_rewrite_html_fast(BASE_URL, _response(body)))
+        self.assertIsNotNone(_rewrite_html(BASE_URL, _response(body)))
+
+    def test_small_and_blank_prefixed_pages_are_rewritten(self):
+        page = '<link href="style.css"><img src="logo.png"><a href="report.pdf">r</a>'
+        for body in (f"<html><head></head><body>{page}</body></html>", "\r\n" * 150 + f"<html><head></head>{page}</html>"):
+            rewritten = _rewrite_html(BASE_URL, _response(body))
+            self.assertIsNotNone(rewritten)
+            self.assertIn(b'<base href="https://ex.com/dir/page.html">', rewritten)
+            self.assertIn(b'<img src="https://ex.com/dir/logo.png">', rewritten)
+            self.assertIn(b"/api/proxy/resource?url=https%3A%2F%2Fex.com%2Fdir%2Freport.pdf", rewritten)
+
+    def test_bodies_without_markup_are_passed_through(self):
+        self.assertIsNone(_rewrite_html(BASE_URL, _response('{"not": "html"}')))
+
+
+if __name__ == "__main__":
+    unittest.main()